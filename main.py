@@ -1,52 +1,64 @@
 import logging
-import requests
+import urllib.request
 
-import autopep8# type: ignore
+from pydantic import TypeAdapter
 
 from parser_types import ApiScheme, PythonReservedNames
 
 
 logging.basicConfig(level=logging.INFO)
 
-logging.info("Fetching v2 api")
-# Using .json parsed api from https://github.com/ark0f/tg-bot-api
-data = requests.get("https://ark0f.github.io/tg-bot-api/custom_v2.json", timeout=15).json()
+_API_SCHEME_ADAPTER = TypeAdapter(ApiScheme)
+_RESERVED_PYTHON = tuple(PythonReservedNames.values())
 
-logging.info("Parsing models...")
-parsed = ApiScheme.model_validate(data)
 
-logging.info("Generate api objects...")
-with open("alya_types/objects.py", "w", encoding="utf-8") as f:
-    f.write(f"""
+def main() -> None:
+    logging.info("Fetching v2 api")
+    # Using .json parsed api from https://github.com/ark0f/tg-bot-api
+    with urllib.request.urlopen("https://ark0f.github.io/tg-bot-api/custom_v2.json", timeout=15) as response:
+        raw = response.read()
+
+    logging.info("Parsing models...")
+    parsed = _API_SCHEME_ADAPTER.validate_json(raw)
+
+    logging.info("Generate api objects...")
+    with open("alya_types/objects.py", "w", buffering=1 << 16, encoding="utf-8") as f:
+        f.write(f"""
 from typing import Union, Optional, Any, List
-            
+
 from pydantic import BaseModel, ConfigDict
-            
-reserved_python = ({', '.join([f'"{el}"' for el in PythonReservedNames.values()])})
+
+reserved_python = {_RESERVED_PYTHON!r}
 
 # pylint: disable=C0301,C0302,W0611
 
-{autopep8.fix_code(parsed.to_code_objects())}""")
-    
-logging.info("Generate api wrapper...")
-with open("alya_types/api_wrapper.py", "w", encoding="utf-8") as f:
-    f.write(f"""
+""")
+        parsed.write_code_objects(f)
+
+    logging.info("Generate api wrapper...")
+    with open("alya_types/api_wrapper.py", "w", buffering=1 << 16, encoding="utf-8") as f:
+        f.write("""
 from typing import Dict, Union, Optional, List, TypeVar, Generic, Type
 
-from httpx import AsyncClient    
+from httpx import AsyncClient
 from pydantic import BaseModel
-            
+
 from alya_types import objects
-            
+
 
 # pylint: disable=C0301,C0302
 T = TypeVar('T')
-            
+
 
 class ApiResponse(BaseModel, Generic[T]):
     ok: bool
     result: T
 
-{autopep8.fix_code(parsed.to_code_methods())}""")
-    
-logging.info("Work done!")
+""")
+        parsed.write_code_methods(f)
+
+    logging.info("Work done!")
+
+
+if __name__ == "__main__":
+    main()
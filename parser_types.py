@@ -1,7 +1,18 @@
 import re
-from typing import Any, List, Literal, Optional
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Literal, Optional, TextIO
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
+
+
+_SNAKE_RE = re.compile(r'(?<!^)(?=[A-Z])')
+
+# replace " with ' and drop the \ from \_
+_DESC_TABLE = str.maketrans({"\"": "'", "\\": ""})
+
+
+def _clean_description(value: str) -> str:
+    return value.translate(_DESC_TABLE)
 
 
 #pylint: disable=E1133,E0213,C0209
@@ -9,12 +20,16 @@ class ApiScheme(BaseModel):
     objects: List["ApiObject"]
     methods: List["ApiMethod"]
 
+    # templates below already emit pep8 formatted code. if a formatter is ever
+    # needed again, run it once over the finished file in main.py, never per object/method
+    def write_code_objects(self, out: TextIO) -> None:
+        for i, el in enumerate(self.objects):
+            if i:
+                out.write('\n\n')
+            el.write_code(out)
 
-    def to_code_objects(self) -> str:
-        return '\n\n'.join(el.to_code() for el in self.objects)
-    
-    def to_code_methods(self) -> str:
-        return """class ApiWrapper:
+    def write_code_methods(self, out: TextIO) -> None:
+        out.write("""class ApiWrapper:
     def __init__(self, token: str, *, api_url: str = "https://api.telegram.org/"):
         self.token = token
         self.api_url = api_url
@@ -32,14 +47,15 @@ class ApiScheme(BaseModel):
             method,
             json=json
         )
-        mdl = ApiResponse[return_type]# type: ignore
+        mdl = ApiResponse[return_type]  # type: ignore
         response = mdl.model_validate(result.json())
         return response.result
 
-    {methods}
-""".format(
-    methods='\n\n    '.join(el.to_function() for el in self.methods)
-) 
+    """)
+        for i, el in enumerate(self.methods):
+            if i:
+                out.write('\n    ')
+            el.write_function(out)
         
 
 
@@ -69,6 +85,43 @@ JsonToPythonTypes = {
     "float": "float"
 }
 
+
+def _typehint_leaf(info: "ApiTypeInfo", _ref_str: bool) -> str:
+    return JsonToPythonTypes[info.type]
+
+
+def _typehint_any_of(info: "ApiTypeInfo", ref_str: bool) -> str:
+    if not info.any_of:
+        return _typehint_leaf(info, ref_str)
+    return f"Union[{', '.join(el.to_typehint(ref_str=ref_str) for el in info.any_of)}]"
+
+
+def _typehint_array(info: "ApiTypeInfo", ref_str: bool) -> str:
+    if not info.array:
+        return _typehint_leaf(info, ref_str)
+    return f"List[{info.array.to_typehint(ref_str=ref_str)}]"
+
+
+def _typehint_reference(info: "ApiTypeInfo", ref_str: bool) -> str:
+    if not info.reference:
+        return _typehint_leaf(info, ref_str)
+    if ref_str:
+        return f"\"{info.reference}\""
+    return f"objects.{info.reference}"
+
+
+def _typehint_unknown(_info: "ApiTypeInfo", _ref_str: bool) -> str:
+    return ""
+
+
+_TYPEHINT_HANDLERS: Dict[str, Callable[["ApiTypeInfo", bool], str]] = {
+    "any_of": _typehint_any_of,
+    "array": _typehint_array,
+    "reference": _typehint_reference,
+    "unknown": _typehint_unknown,
+}
+
+
 class ApiTypeInfo(BaseModel):
     type: ApiObjectTypes
     enumeration: Optional[List] = None
@@ -78,22 +131,7 @@ class ApiTypeInfo(BaseModel):
     any_of: Optional[List["ApiTypeInfo"]] = None
 
     def to_typehint(self, *, ref_str: bool = True) -> str:
-        typehint = ""
-        if self.type == "any_of" and self.any_of:
-            typehint = f"Union[{', '.join(el.to_typehint(ref_str=ref_str) for el in self.any_of)}]"
-        elif self.type == "array" and self.array:
-            typehint = f"List[{self.array.to_typehint(ref_str=ref_str)}]"
-        elif self.type == "unknown":
-            ...
-        elif self.type == "reference" and self.reference:
-            if ref_str:
-                typehint = f"\"{self.reference}\""
-            else:
-                typehint = f"objects.{self.reference}"
-        else: 
-            typehint = JsonToPythonTypes[self.type]
-
-        return typehint
+        return _TYPEHINT_HANDLERS.get(self.type, _typehint_leaf)(self, ref_str)
 
 # Methods
 class ApiMethod(BaseModel):
@@ -102,55 +140,42 @@ class ApiMethod(BaseModel):
     arguments: List["ApiProperty"]
     maybe_multipart: bool
     return_type: ApiTypeInfo
-    @field_validator("description")
-    def validate_description(cls, value: str, _):
-        # replace "
-        value = value.replace("\"", "'")
-        # replace \_
-        value = value.replace("\\", "")
-        return value
+    validate_description = field_validator("description")(_clean_description)
     
-    def to_function(self) -> str:
+    def write_function(self, out: TextIO) -> None:
         args = []
         args_opt = []
-        json_params = []
-        
-        for el in self.arguments:
+        json_params = [""] * len(self.arguments)
+
+        for i, el in enumerate(self.arguments):
             if el.required:
                 args.append(el.to_typehint(ref_str=False))
             else:
                 args_opt.append(el.to_typehint(ref_str=False))
-            json_params.append(f"\"{el.name[:-1] if el.name.endswith('_') else el.name}\": {el.name}")
+            json_params[i] = f"\"{el.json_key}\": {el.name}"
 
         if args_opt:
             args.append('*')
-            args += args_opt
-        snake_case_name = re.sub(r'(?<!^)(?=[A-Z])', '_', self.name).lower()
-        return '''async def {snake_case_name}(self{first_comma}{args}) -> {return_typehint}:
-        """{description}
-
-        Args:
-            {doc_args}
-        """
-        response_api: {return_typehint} = await self.exec_request(
-            "{name}",
-            json={json_params},
-            return_type={return_typehint} # type: ignore
-
-        )
-        return response_api
-'''.format(
-    snake_case_name=snake_case_name,
-    description=self.description,
-    name=self.name,
-    json_params='{' + ',\n                '.join(json_params) + '}',
-    first_comma=', ' if args else '',
-    args=', '.join(args),
-    return_typehint=self.return_type.to_typehint(ref_str=False),
-    doc_args='\n            '.join([el.to_doc_line() for el in self.arguments]),
-
-
-)
+            args.extend(args_opt)
+        snake_case_name = _SNAKE_RE.sub('_', self.name).lower()
+        return_typehint = self.return_type.to_typehint(ref_str=False)
+
+        out.write(f"async def {snake_case_name}(self{', ' if args else ''}{', '.join(args)}) -> {return_typehint}:\n")
+        out.write(f'        """{self.description}\n\n        Args:\n')
+        if not self.arguments:
+            out.write('\n')
+        for el in self.arguments:
+            out.write('            ')
+            out.write(el.to_doc_line())
+            out.write('\n')
+        out.write('        """\n')
+        out.write(f'        response_api: {return_typehint} = await self.exec_request(\n')
+        out.write(f'            "{self.name}",\n')
+        out.write('            json={')
+        out.write(',\n                  '.join(json_params))
+        out.write('},\n')
+        out.write(f'            return_type={return_typehint}  # type: ignore\n\n')
+        out.write('        )\n        return response_api\n')
 
 # Objects
 class ApiProperty(BaseModel):
@@ -158,36 +183,53 @@ class ApiProperty(BaseModel):
     description: str
     required: bool
     type_info: ApiTypeInfo
+    # original api name, `name` gets renamed if it is a python reserved word
+    json_key: str = Field(validation_alias="name")
 
     @field_validator("name")
     def validate_name(cls, value, _):
         formated_name = PythonReservedNames.get(value)
         return formated_name or value
     
-    @field_validator("description")
-    def validate_description(cls, value: str, _):
-        # replace "
-        value = value.replace("\"", "'")
-        # replace \_
-        value = value.replace("\\", "")
-        return value
+    validate_description = field_validator("description")(_clean_description)
 
-    def to_typehint(self, *, ref_str: bool = True) -> str:
+    # generated strings, built on first use and kept in the instance __dict__
+    @cached_property
+    def typehint_str(self) -> str:
+        return self.__compute_typehint(ref_str=True)
+
+    @cached_property
+    def typehint_obj(self) -> str:
+        return self.__compute_typehint(ref_str=False)
+
+    @cached_property
+    def doc_line(self) -> str:
+        return f"{self.name} ({self.type_info.to_typehint()}): {self.description}"
 
-        default_value = self.type_info.default or None
+    def __compute_typehint(self, *, ref_str: bool) -> str:
+        typehint = self.type_info.to_typehint(ref_str=ref_str)
+        default = self.type_info.default
+        if not default:
+            default_repr = ""
+        elif self.type_info.type == "string":
+            default_repr = repr(default)
+        else:
+            default_repr = str(default)
 
-        if default_value and self.type_info.type == "string":
-            default_value = f"\"{default_value}\""
         if not self.required:
-            return f"{self.name}: Optional[{self.type_info.to_typehint(ref_str=ref_str)}] = {default_value}"
+            return f"{self.name}: Optional[{typehint}] = {default_repr or 'None'}"
+        if default_repr:
+            return f"{self.name}: {typehint} = {default_repr}"
+        return f"{self.name}: {typehint}"
+
+    def to_typehint(self, *, ref_str: bool = True) -> str:
+        return self.typehint_str if ref_str else self.typehint_obj
 
-        return f"{self.name}: {self.type_info.to_typehint(ref_str=ref_str)}{' = ' + str(default_value) if default_value else ''}" 
-    
     def to_obj_var(self) -> str:
         return f"self.{self.name} = {self.name}"
     
     def to_doc_line(self) -> str:
-        return f"{self.name} ({self.type_info.to_typehint()}): {self.description}"
+        return self.doc_line
 
 
 
@@ -199,66 +241,48 @@ class ApiObject(BaseModel):
     properties: Optional[List[ApiProperty]] = None
     any_of: Optional[List[ApiTypeInfo]] = None
 
-    @field_validator("description")
-    def validate_description(cls, value: str, _):
-        # replace "
-        value = value.replace("\"", "'")
-        # replace \_
-        value = value.replace("\\", "")
-        return value
+    validate_description = field_validator("description")(_clean_description)
 
-    def __to_code_properties(self) -> str:
+    def __write_code_properties(self, out: TextIO) -> None:
         if not self.properties:
             raise ValueError("can not parse properties")
-        
-        typehints = []
-        typehints_optional = []
-        vars_init = []
-        doc_lines = []
-        for el in self.properties:
-            if el.required and not el.type_info.default:
-                typehints.append(el.to_typehint())
-            else:
-                typehints_optional.append(el.to_typehint())
-            doc_lines.append(el.to_doc_line())
-            vars_init.append(el.to_obj_var())
-
-        if typehints_optional:
-            # typehints.append('*')
-            typehints += typehints_optional
-        return """class {name}(BaseModel):
-    \"\"\"{description}
-
-    {documentation_link}
-    \"\"\"
-    model_config = ConfigDict(
-        populate_by_name=True,
-        alias_generator=lambda x: x[:-1] if x in reserved_python else x,
-    )
-    {properties} 
-    
-""".format(
-    name=self.name,
-    description=self.description,
-    documentation_link=self.documentation_link,
-    properties='\n    '.join([f"{el.to_typehint()}\n    \"\"\"{el.to_doc_line()}\"\"\"" for el in self.properties])
-)
-    
-    def __to_code_any_of(self) -> str:
+
+        out.write(f'class {self.name}(BaseModel):\n')
+        out.write(f'    """{self.description}\n\n    {self.documentation_link}\n    """\n')
+        out.write('    model_config = ConfigDict(\n')
+        out.write('        populate_by_name=True,\n')
+        out.write('        alias_generator=lambda x: x[:-1] if x in reserved_python else x,\n')
+        out.write('    )\n    ')
+        for i, el in enumerate(self.properties):
+            if i:
+                out.write('\n    ')
+            out.write(el.to_typehint())
+            out.write('\n    """')
+            out.write(el.to_doc_line())
+            out.write('"""')
+        out.write('\n')
+
+    def __write_code_any_of(self, out: TextIO) -> None:
         if not self.any_of:
             raise ValueError("can not parse any_of")
-        return f"{self.name} = Union[{', '.join(el.to_typehint() for el in self.any_of)}]\n\"\"\"{self.description}\"\"\""
 
-    def __to_code_unknown(self) -> str:
-        return f"{self.name} = Any\n\"\"\"{self.description}\"\"\""
+        out.write(f'{self.name} = Union[')
+        for i, el in enumerate(self.any_of):
+            if i:
+                out.write(', ')
+            out.write(el.to_typehint())
+        out.write(f']\n"""{self.description}"""\n')
+
+    def __write_code_unknown(self, out: TextIO) -> None:
+        out.write(f"{self.name} = Any\n\"\"\"{self.description}\"\"\"\n")
 
-    def to_code(self) -> str:
+    def write_code(self, out: TextIO) -> None:
         if self.type == "properties":
-            return self.__to_code_properties()
+            self.__write_code_properties(out)
         elif self.type == "any_of":
-            return self.__to_code_any_of()
+            self.__write_code_any_of(out)
         elif self.type == "unknown":
-            return self.__to_code_unknown()
-        print(self.name, "can not be parsed!")
-        return ""
+            self.__write_code_unknown(out)
+        else:
+            print(self.name, "can not be parsed!")
         